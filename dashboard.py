@@ -6,23 +6,30 @@ Real-time monitoring and visualization of kernel metrics
 For OS Competition - Demonstrates educational value through visualization
 """
 
+import os
 import sys
-import re
+import queue
 import subprocess
 import threading
 import time
 from collections import deque
-from datetime import datetime
+from itertools import islice
 
 # Configuration constants
 LOG_TRUNCATE_LENGTH = 60  # Maximum length for log lines in display
 DASHBOARD_UPDATE_INTERVAL_MS = 500  # Update interval in milliseconds
 
+# NumPy backs the metric history ring buffer; only the graphical
+# dashboard consumes the history, so text mode works without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Try to import visualization libraries, fallback to text mode
 try:
     import matplotlib
     # Check if display is available before setting backend
-    import os
     INTERACTIVE_BACKEND = False
     if os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'):
         # Try TkAgg first, fall back to other backends if tkinter not available
@@ -50,6 +57,7 @@ try:
         raise ImportError("Text mode")
     import matplotlib.pyplot as plt
     from matplotlib.animation import FuncAnimation
+    from matplotlib.patches import Rectangle
     GRAPHICS_AVAILABLE = INTERACTIVE_BACKEND
 except (ImportError, RuntimeError):
     GRAPHICS_AVAILABLE = False
@@ -61,62 +69,131 @@ except (ImportError, RuntimeError):
 
 class KernelMonitor:
     """Monitor kernel output and extract metrics"""
-    
-    def __init__(self):
+
+    # Maps METRICS key names to the attributes they update
+    _KEY_MAP = {
+        'memory_total_mb': 'memory_total',
+        'memory_used_mb': 'memory_used',
+        'memory_free_mb': 'memory_free',
+        'process_count': 'process_count',
+        'syscall_count': 'syscall_count',
+    }
+
+    def __init__(self, log_depth=16, history_depth=50):
         self.memory_total = 0
         self.memory_used = 0
         self.memory_free = 0
         self.process_count = 0
         self.syscall_count = 0
-        self.boot_time = None
-        self.logs = deque(maxlen=100)  # Keep last 100 log lines
-        
-        # Time series data for charts
-        self.timestamps = deque(maxlen=50)
-        self.memory_used_history = deque(maxlen=50)
-        self.memory_free_history = deque(maxlen=50)
+        self.boot_time_ns = None
+        # The dashboards only ever show the last 8-10 lines, so the
+        # default retention stays close to that
+        self.logs = deque(maxlen=log_depth)
+        # Bumped whenever a metric value actually changes, so consumers
+        # can skip rebuilding their displays when nothing is new
+        self._metrics_version = 0
+        # Bumped per ingested line so consumers can tell the log panel
+        # is stale without comparing deque contents
+        self._log_seq = 0
         
+        # Time series data for charts: one contiguous (timestamp, used,
+        # free) ring buffer instead of three parallel deques, so the
+        # plot (and any derived analytics) can slice it vectorized
+        self.history_depth = history_depth
+        self._hist = (np.zeros((self.history_depth, 3), dtype=np.float32)
+                      if np is not None else None)
+        self._hist_idx = 0
+        self._hist_count = 0
+
+        # Bounded queue decouples the stdout reader from parsing so a
+        # burst of kernel output never backpressures QEMU's pipe
+        self._line_q = queue.Queue(maxsize=4096)
+        self._parse_thread = threading.Thread(target=self._parse_worker, daemon=True)
+        self._parse_thread.start()
+
+    def submit_line(self, line):
+        """Queue a line for parsing, dropping the oldest entry when full"""
+        try:
+            self._line_q.put_nowait(line)
+        except queue.Full:
+            # Drop the oldest line to preserve liveness under burst
+            try:
+                self._line_q.get_nowait()
+            except queue.Empty:
+                pass
+            self._line_q.put_nowait(line)
+
+    def _parse_worker(self):
+        """Drain queued lines off the reader thread"""
+        while True:
+            self.parse_line(self._line_q.get())
+
     def parse_line(self, line):
         """Parse a log line and extract metrics"""
-        self.logs.append(line)
+        # Truncate once at ingest; every consumer only ever displays
+        # bounded-width lines
+        if len(line) > LOG_TRUNCATE_LENGTH:
+            self.logs.append(line[:LOG_TRUNCATE_LENGTH] + '...')
+        else:
+            self.logs.append(line)
+        self._log_seq += 1
         
-        # Check for boot
-        if "[KERNEL]" in line and "initialization..." in line:
-            self.boot_time = datetime.now()
+        # Check for boot; boot happens at most once, so the sentinel
+        # skips both substring scans for the rest of the run
+        if self.boot_time_ns is None and "[KERNEL]" in line and "initialization..." in line:
+            self.boot_time_ns = time.monotonic_ns()
         
-        # Parse METRICS lines
-        if "[METRICS]" in line:
-            # Extract key=value pairs
-            match = re.search(r'memory_total_mb=(\d+)', line)
-            if match:
-                self.memory_total = int(match.group(1))
-            
-            match = re.search(r'memory_used_mb=(\d+)', line)
-            if match:
-                self.memory_used = int(match.group(1))
-                
-            match = re.search(r'memory_free_mb=(\d+)', line)
-            if match:
-                self.memory_free = int(match.group(1))
-            
-            match = re.search(r'process_count=(\d+)', line)
-            if match:
-                self.process_count = int(match.group(1))
-            
-            match = re.search(r'syscall_count=(\d+)', line)
-            if match:
-                self.syscall_count = int(match.group(1))
+        # Cheap substring prefilter: most lines are not METRICS lines, so
+        # bail out before any regex work is set up
+        if "[METRICS]" not in line:
+            return
+
+        # Extract all key=value pairs in a single scan. str.split and
+        # str.partition run in C, keeping the per-line hot path out of
+        # the regex engine entirely
+        changed = False
+        for token in line.split():
+            key, sep, digits = token.partition('=')
+            attr = self._KEY_MAP.get(key)
+            if attr is None or not sep or not digits.isdigit():
+                continue
+            value = int(digits)
+            if getattr(self, attr) != value:
+                setattr(self, attr, value)
+                changed = True
+        if changed:
+            self._metrics_version += 1
+
+        # Only METRICS lines change the metrics, so sample here rather
+        # than once per log line
+        self.update_history()
     
     def update_history(self):
         """Add current metrics to history"""
-        self.timestamps.append(time.time())
-        self.memory_used_history.append(self.memory_used)
-        self.memory_free_history.append(self.memory_free)
+        if self._hist is None:
+            return
+        self._hist[self._hist_idx] = (time.monotonic(), self.memory_used,
+                                      self.memory_free)
+        self._hist_idx = (self._hist_idx + 1) % self.history_depth
+        if self._hist_count < self.history_depth:
+            self._hist_count += 1
+
+    def history_view(self):
+        """Return the (timestamp, used, free) history in logical order"""
+        if self._hist_count < self.history_depth:
+            return self._hist[:self._hist_count]
+        return np.concatenate((self._hist[self._hist_idx:],
+                               self._hist[:self._hist_idx]))
 
 
 class TextDashboard:
     """Text-based dashboard for when matplotlib is not available"""
-    
+
+    # Only bar_width + 1 distinct progress bars exist; build them once
+    # instead of concatenating a fresh 40-char string per display
+    _BAR_WIDTH = 40
+    _BARS = ["█" * i + "░" * (40 - i) for i in range(41)]
+
     def __init__(self, monitor):
         self.monitor = monitor
         
@@ -126,9 +203,9 @@ class TextDashboard:
         print("  RPOS KERNEL DASHBOARD - Text Mode")
         print("="*60)
         
-        if self.monitor.boot_time:
-            uptime = datetime.now() - self.monitor.boot_time
-            print(f"Uptime: {uptime.total_seconds():.1f}s")
+        if self.monitor.boot_time_ns is not None:
+            uptime_s = (time.monotonic_ns() - self.monitor.boot_time_ns) / 1e9
+            print(f"Uptime: {uptime_s:.1f}s")
         
         print(f"\nMemory Status:")
         print(f"  Total: {self.monitor.memory_total} MB")
@@ -137,17 +214,16 @@ class TextDashboard:
         
         if self.monitor.memory_total > 0:
             usage_pct = (self.monitor.memory_used / self.monitor.memory_total) * 100
-            bar_width = 40
-            filled = int(bar_width * usage_pct / 100)
-            bar = "█" * filled + "░" * (bar_width - filled)
-            print(f"  Usage: [{bar}] {usage_pct:.1f}%")
+            filled = min(self._BAR_WIDTH, int(self._BAR_WIDTH * usage_pct / 100))
+            print(f"  Usage: [{self._BARS[filled]}] {usage_pct:.1f}%")
         
         print(f"\nProcess Management:")
         print(f"  Active Processes: {self.monitor.process_count}")
         print(f"  System Calls:     {self.monitor.syscall_count}")
         
         print(f"\nRecent Kernel Logs:")
-        for log in list(self.monitor.logs)[-10:]:
+        n = len(self.monitor.logs)
+        for log in islice(self.monitor.logs, max(0, n - 10), n):
             print(f"  {log}")
         
         print("="*60 + "\n")
@@ -155,83 +231,153 @@ class TextDashboard:
 
 class GraphicalDashboard:
     """Graphical dashboard using matplotlib"""
-    
+
     def __init__(self, monitor):
         self.monitor = monitor
         self.fig, self.axes = plt.subplots(2, 2, figsize=(12, 8))
         self.fig.suptitle('RPOS Kernel Real-time Dashboard', fontsize=16)
-        
-    def update(self, frame):
-        """Update all plots"""
-        # Clear all axes
-        for ax in self.axes.flat:
-            ax.clear()
-        
-        # Plot 1: Memory Usage Pie Chart
+        self._last_metrics_version = -1
+        self._last_state = (-1, -1)
+        self._init_artists()
+
+    def _init_artists(self):
+        """Create all plot artists once; update() only mutates them"""
+        # Plot 1: Memory Usage bar. A split bar updated via set_width /
+        # set_x is far cheaper than recomputing pie wedge geometry and
+        # label placement every frame
         ax1 = self.axes[0, 0]
-        if self.monitor.memory_total > 0:
-            sizes = [self.monitor.memory_used, self.monitor.memory_free]
-            labels = [f'Used ({self.monitor.memory_used} MB)', 
-                     f'Free ({self.monitor.memory_free} MB)']
-            colors = ['#ff6b6b', '#51cf66']
-            ax1.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            ax1.set_title('Memory Usage')
-        else:
-            ax1.text(0.5, 0.5, 'Waiting for data...', ha='center', va='center')
-            ax1.set_title('Memory Usage')
-        
+        ax1.set_title('Memory Usage')
+        ax1.set_xlim(0, 1)
+        ax1.set_ylim(0, 1)
+        ax1.axis('off')
+        # Hidden until the first METRICS arrive so only the waiting text
+        # shows, as in the pie-chart days
+        self._free_rect = Rectangle((0, 0.4), 1, 0.25, color='#51cf66',
+                                    visible=False)
+        self._used_rect = Rectangle((0, 0.4), 0, 0.25, color='#ff6b6b',
+                                    visible=False)
+        ax1.add_patch(self._free_rect)
+        ax1.add_patch(self._used_rect)
+        self._mem_text = ax1.text(0.5, 0.2, '', ha='center', va='center',
+                                  fontsize=10)
+        self._mem_wait_text = ax1.text(0.5, 0.5, 'Waiting for data...',
+                                       ha='center', va='center')
+
         # Plot 2: Memory Usage Over Time
         ax2 = self.axes[0, 1]
-        if len(self.monitor.memory_used_history) > 0:
-            x = list(range(len(self.monitor.memory_used_history)))
-            ax2.plot(x, list(self.monitor.memory_used_history), 'r-', label='Used', linewidth=2)
-            ax2.plot(x, list(self.monitor.memory_free_history), 'g-', label='Free', linewidth=2)
-            ax2.set_xlabel('Time (samples)')
-            ax2.set_ylabel('Memory (MB)')
-            ax2.set_title('Memory Trend')
-            ax2.legend()
-            ax2.grid(True, alpha=0.3)
-        else:
-            ax2.text(0.5, 0.5, 'Collecting data...', ha='center', va='center')
-            ax2.set_title('Memory Trend')
-        
+        self._used_line, = ax2.plot([], [], 'r-', label='Used', linewidth=2)
+        self._free_line, = ax2.plot([], [], 'g-', label='Free', linewidth=2)
+        ax2.set_xlabel('Time (samples)')
+        ax2.set_ylabel('Memory (MB)')
+        ax2.set_title('Memory Trend')
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+        # The history ring buffer is bounded, so the x axis never
+        # changes; build it once
+        self._x_axis = np.arange(self.monitor.history_depth)
+        ax2.set_xlim(0, self.monitor.history_depth - 1)
+        self._trend_y_max = 1
+        ax2.set_ylim(0, self._trend_y_max)
+
         # Plot 3: System Statistics
         ax3 = self.axes[1, 0]
-        stats = [
-            f'Total Memory: {self.monitor.memory_total} MB',
-            f'Processes: {self.monitor.process_count}',
-            f'System Calls: {self.monitor.syscall_count}',
-        ]
-        if self.monitor.boot_time:
-            uptime = datetime.now() - self.monitor.boot_time
-            stats.insert(0, f'Uptime: {uptime.total_seconds():.1f}s')
-        
         ax3.axis('off')
-        ax3.text(0.1, 0.9, 'System Statistics:', fontsize=12, fontweight='bold')
-        for i, stat in enumerate(stats):
-            ax3.text(0.1, 0.7 - i*0.15, stat, fontsize=10)
         ax3.set_title('Kernel Status')
-        
+        ax3.text(0.1, 0.9, 'System Statistics:', fontsize=12, fontweight='bold')
+        self._stat_texts = [ax3.text(0.1, 0.7 - i * 0.15, '', fontsize=10)
+                            for i in range(4)]
+
         # Plot 4: Recent Logs
         ax4 = self.axes[1, 1]
         ax4.axis('off')
-        ax4.text(0.05, 0.95, 'Recent Kernel Logs:', fontsize=10, fontweight='bold')
-        recent_logs = list(self.monitor.logs)[-8:]
-        for i, log in enumerate(recent_logs):
-            # Truncate long logs to fit in display
-            log_text = log[:LOG_TRUNCATE_LENGTH] + '...' if len(log) > LOG_TRUNCATE_LENGTH else log
-            y_pos = 0.85 - i * 0.1
-            ax4.text(0.05, y_pos, log_text, fontsize=8, family='monospace')
         ax4.set_title('Console Output')
-        
+        ax4.text(0.05, 0.95, 'Recent Kernel Logs:', fontsize=10, fontweight='bold')
+        self._log_texts = [ax4.text(0.05, 0.85 - i * 0.1, '', fontsize=8,
+                                    family='monospace')
+                           for i in range(8)]
+
+        # Every animated artist, in one tuple: blit restores the cached
+        # axes background each frame, so update() must always return all
+        # of them or the omitted ones vanish from the screen
+        self._artists = (self._used_rect, self._free_rect, self._mem_text,
+                         self._mem_wait_text, self._used_line, self._free_line,
+                         *self._stat_texts, *self._log_texts)
+
         plt.tight_layout()
-    
+
+    def _update_uptime(self):
+        """Refresh the uptime stat text"""
+        if self.monitor.boot_time_ns is not None:
+            uptime_s = (time.monotonic_ns() - self.monitor.boot_time_ns) / 1e9
+            self._stat_texts[0].set_text(f'Uptime: {uptime_s:.1f}s')
+
+    def update(self, frame):
+        """Update all plot artists in place"""
+        # When neither the metrics nor the log tail changed since the
+        # last frame, skip the rebuild work and only tick the uptime.
+        # The full artist tuple is still returned: blit clears to the
+        # empty cached background, so every artist must be redrawn
+        state = (self.monitor._metrics_version, self.monitor._log_seq)
+        if state == self._last_state and frame > 0:
+            self._update_uptime()
+            return self._artists
+        self._last_state = state
+
+        # Plot 1: Memory Usage bar
+        if self.monitor.memory_total > 0:
+            self._mem_wait_text.set_visible(False)
+            self._used_rect.set_visible(True)
+            self._free_rect.set_visible(True)
+            used = self.monitor.memory_used
+            free = self.monitor.memory_free
+            pct = used / max(1, self.monitor.memory_total)
+            self._used_rect.set_width(pct)
+            self._free_rect.set_x(pct)
+            self._free_rect.set_width(1 - pct)
+            self._mem_text.set_text(
+                f'Used: {used} MB ({pct * 100:.1f}%)   Free: {free} MB')
+
+        # Plot 2: Memory Usage Over Time
+        hist = self.monitor.history_view()
+        count = len(hist)
+        if count > 0:
+            self._used_line.set_data(self._x_axis[:count], hist[:, 1])
+            self._free_line.set_data(self._x_axis[:count], hist[:, 2])
+            y_max = max(self.monitor.memory_used, self.monitor.memory_free, 1)
+            if y_max > self._trend_y_max:
+                # Rescale needs a synchronous full redraw: the blit
+                # background for the new view is recaptured right after
+                # update() returns, so a deferred draw_idle would cache
+                # a background still rendered with the old limits
+                self._trend_y_max = y_max
+                self.axes[0, 1].set_ylim(0, y_max * 1.1)
+                self.fig.canvas.draw()
+
+        # Plot 3: System Statistics. The uptime ticks every frame, but
+        # the metric strings are only rebuilt when a value changed
+        self._update_uptime()
+        version = self.monitor._metrics_version
+        if version != self._last_metrics_version:
+            self._last_metrics_version = version
+            self._stat_texts[1].set_text(f'Total Memory: {self.monitor.memory_total} MB')
+            self._stat_texts[2].set_text(f'Processes: {self.monitor.process_count}')
+            self._stat_texts[3].set_text(f'System Calls: {self.monitor.syscall_count}')
+
+        # Plot 4: Recent Logs
+        n = len(self.monitor.logs)
+        recent_logs = list(islice(self.monitor.logs, max(0, n - 8), n))
+        for text, log in zip(self._log_texts, recent_logs + [''] * 8):
+            text.set_text(log)
+
+        return self._artists
+
     def show(self):
         """Start the dashboard"""
         ani = FuncAnimation(
-            self.fig, 
-            self.update, 
+            self.fig,
+            self.update,
             interval=DASHBOARD_UPDATE_INTERVAL_MS,
+            blit=True,
             cache_frame_data=False
         )
         plt.show()
@@ -261,22 +407,69 @@ def run_kernel_and_monitor(monitor, text_mode=False):
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             stdin=subprocess.DEVNULL,
-            universal_newlines=True,
-            bufsize=1
+            bufsize=-1
         )
-        
-        # Read output line by line
-        for line in process.stdout:
-            line = line.rstrip()
+
+        text_dashboard = TextDashboard(monitor) if text_mode else None
+        last_display_ns = 0
+        display_interval_ns = DASHBOARD_UPDATE_INTERVAL_MS * 1_000_000
+
+        # Batch the console echo: one write per read chunk instead of a
+        # flushing print per line, so a boot burst costs one syscall
+        out = sys.stdout
+        echo_buf = []
+
+        def flush_echo():
+            if echo_buf:
+                echo_buf.append('')  # join adds the trailing newline
+                out.write('\n'.join(echo_buf))
+                out.flush()
+                echo_buf.clear()
+
+        def handle_line(line):
+            nonlocal last_display_ns
+            echo_buf.append(line)
+
+            if not text_mode:
+                monitor.submit_line(line)
+                return
+
+            # Text mode parses synchronously so a display triggered by a
+            # METRICS line always sees that line's values; the queue is
+            # only needed to keep the graphical reader thread unblocked
+            monitor.parse_line(line)
+
+            # Periodically update display (rate-limited so a METRICS
+            # burst does not flood the terminal)
+            if "[METRICS]" in line:
+                now = time.monotonic_ns()
+                if now - last_display_ns >= display_interval_ns:
+                    last_display_ns = now
+                    flush_echo()
+                    text_dashboard.display()
+
+        # Chunked reads off the raw pipe fd: one 64 KiB os.read plus an
+        # in-C split replaces a Python-level readline per line. Kernel
+        # output is pure ASCII, so decoding per line is branchless-cheap
+        fd = process.stdout.fileno()
+        buf = bytearray()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            buf += chunk
+            *raw_lines, buf = buf.split(b'\n')
+            for raw in raw_lines:
+                line = raw.decode('ascii', 'replace').rstrip()
+                if line:
+                    handle_line(line)
+            flush_echo()
+        # Flush any unterminated final line
+        if buf:
+            line = buf.decode('ascii', 'replace').rstrip()
             if line:
-                print(line)  # Echo to console
-                monitor.parse_line(line)
-                monitor.update_history()
-                
-                # In text mode, periodically update display
-                if text_mode and "[METRICS]" in line:
-                    dashboard = TextDashboard(monitor)
-                    dashboard.display()
+                handle_line(line)
+        flush_echo()
         
         process.wait()
         print(f"\n[DASHBOARD] Kernel exited with code {process.returncode}")